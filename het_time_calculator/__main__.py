@@ -1,5 +1,3 @@
-import matplotlib.pyplot as plt
-
 from .calculations import perform_all_calculations
 from .config import HTC_CONFIG
 from .plotting import plot_visit_histograms, setup_visit_plot
@@ -10,6 +8,9 @@ def main():
     target_table, visits_table = perform_all_calculations()
     HTC_CONFIG.write_output_file(target_table)
 
+    # Only import matplotlib once the calculations are done
+    import matplotlib.pyplot as plt
+
     fig, ax = setup_visit_plot()
     plot_visit_histograms(ax, visits_table)
     HTC_CONFIG.save_plot(fig)
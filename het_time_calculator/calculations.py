@@ -2,153 +2,228 @@
 and the number of visits for each time.
 """
 
-from typing import Dict, Literal, Optional, Tuple
+from dataclasses import dataclass
+from typing import Dict, List, Literal, Optional, Tuple
 
 import numpy as np
-from astropy.table import Row, Table
+from astropy.table import Table
 
 from .config import HTC_CONFIG, HetTimeCalcConfig
 from .util import Trimester
 
 
-def _get_optimal_hour_angles(het_table: Table, dec: float) -> Dict[str, float]:
-    """For the given dec, find the optimal start/stop times in LST
-    i.e., find closest h_dec and get the HA values (1,2,3,4).
+@dataclass
+class TargetArrays:
+    """The target properties needed for the calculations, materialized as
+    contiguous arrays so the calculations don't go through table columns."""
+
+    target_id: np.ndarray
+    ra: np.ndarray
+    dec: np.ndarray
+    t_exp: np.ndarray
+    num_visits: np.ndarray
+
+    @classmethod
+    def from_table(cls, target_table: Table) -> "TargetArrays":
+        """Extract the arrays from the sanitized target table."""
+        return cls(
+            target_id=np.asarray(target_table["target_id"]),
+            **{
+                colname: np.ascontiguousarray(target_table[colname], dtype=np.float64)
+                for colname in ["ra", "dec", "t_exp", "num_visits"]
+            },
+        )
+
+
+@dataclass
+class HetArrays:
+    """The HET decs in ascending order and the matching (N, 4) matrix
+    of hour angles, used to look up the optimal hour angles."""
+
+    dec: np.ndarray
+    hour_angles: np.ndarray
+
+    @classmethod
+    def from_table(cls, het_table: Table) -> "HetArrays":
+        """Build the lookup arrays from the columns of the given HET table.
+        They are derived on every call rather than stored alongside the table,
+        so filtered or otherwise modified tables can never use stale arrays."""
+        sort_indices = np.argsort(het_table["dec"], kind="stable")
+        hour_angles = [f"hour_angle_{i}" for i in range(1, 5)]
+        return cls(
+            dec=np.ascontiguousarray(het_table["dec"], dtype=np.float64)[sort_indices],
+            hour_angles=np.stack(
+                [np.asarray(het_table[ha_key])[sort_indices] for ha_key in hour_angles],
+                axis=1,
+            ),
+        )
 
-    Returns
-    -------
-    dict[str, float]
-        The optimal hour angles for the given dec, mapped via their names,
-        i.e., "hour_angle_1": optimal hour angle 1.
-    """
-    dec_diff = np.abs(het_table["dec"] - dec)
-    min_index = np.argmin(dec_diff)
-    hour_angles = [f"hour_angle_{i}" for i in range(1, 5)]
-    optimal_hour_angles = {
-        ha_key: het_table[ha_key][min_index] for ha_key in hour_angles
-    }
-    return optimal_hour_angles
 
+def _get_closest_dec_indices(dec_sorted: np.ndarray, dec: np.ndarray) -> np.ndarray:
+    """Find the indices of the entries of the ascending dec_sorted array closest
+    to the given decs via binary search.
+    On ties, the larger dec is chosen."""
+    indices = np.clip(np.searchsorted(dec_sorted, dec), 1, len(dec_sorted) - 1)
+    lower_diff = dec - dec_sorted[indices - 1]
+    upper_diff = dec_sorted[indices] - dec
+    return np.where(upper_diff <= lower_diff, indices, indices - 1)
+
+
+def _get_optimal_hour_angles(
+    het_arrays: HetArrays, dec: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """For the given decs, find the optimal start/stop times in LST
+    i.e., find the closest h_dec for each of them and get the HA values (1,2,3,4).
 
-def _is_on_track(ha_1: float, ha_2: float) -> bool:
-    """Determine if the given hour angles are valid
     Returns
     -------
-    bool
-        True if the target is on the given track, False otherwise.
+    tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        The optimal hour angles 1, 2, 3 and 4 for the given decs.
     """
-    return all(np.abs(hour_angle) < 5 for hour_angle in [ha_1, ha_2])
+    min_indices = _get_closest_dec_indices(het_arrays.dec, dec)
+    ha_1, ha_2, ha_3, ha_4 = het_arrays.hour_angles[min_indices].T
+    return ha_1, ha_2, ha_3, ha_4
+
+
+def _format_hour_angles_for_msg(hour_angles: Tuple[float, ...]) -> Dict[str, float]:
+    """Map the optimal hour angles of a single target to their names,
+    i.e., "hour_angle_1": optimal hour angle 1."""
+    return {f"hour_angle_{i}": ha for i, ha in enumerate(hour_angles, start=1)}
 
 
-def _calculate_ha_values(ha1, ha2) -> Dict[str, float]:
+def _calculate_ha_values(
+    ha1, ha2
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
     """Calculate the min, max, midpoint, and total hour angles from the given hour angles."""
-    hami = np.min([ha1, ha2])
-    hama = np.max([ha1, ha2])
-    hamid = hami + (hama - hami) / 2.0
+    hami = np.minimum(ha1, ha2)
+    hama = np.maximum(ha1, ha2)
+    # The midpoint is symmetric in both angles, so there's no need to use min/max here
+    hamid = (ha1 + ha2) * 0.5
     ha_total = hama - hami
-    keys = ["min", "max", "mid", "total"]
-    values = hami, hama, hamid, ha_total
-    return dict(zip(keys, values))
+    return hami, hama, hamid, ha_total
 
 
-def _issue_exptime_warning(
+def _get_exptime_warning(
     ha_total, req_h, num_visits_requested, needed_visits, hour_angles, target_id
-):
-    print(" ")
-    print(f"Target: {target_id}")
-    ha_str = ", ".join(f"{k}: {v:.2f}" for k, v in hour_angles.items())
-    print(f"Optimal hour angles: {ha_str}")
-    print(f"Only {ha_total:.2f} h on the first track available.")
-    print(f"You requested: {req_h:.2f} h per ({num_visits_requested:.0f}) visit")
-    print("\tWARNING: that is a PROBLEM -- need more visits.")
-    print(f"\tFor now you get {needed_visits:.0f} visits instead.")
+) -> str:
+    """Compose the warning for a target whose requested time per visit
+    exceeds the available one."""
+    named_hour_angles = _format_hour_angles_for_msg(hour_angles)
+    ha_str = ", ".join(f"{k}: {v:.2f}" for k, v in named_hour_angles.items())
+    lines = [
+        " ",
+        f"Target: {target_id}",
+        f"Optimal hour angles: {ha_str}",
+        f"Only {ha_total:.2f} h on the first track available.",
+        f"You requested: {req_h:.2f} h per ({num_visits_requested:.0f}) visit",
+        "\tWARNING: that is a PROBLEM -- need more visits.",
+        f"\tFor now you get {needed_visits:.0f} visits instead.",
+    ]
+    return "\n".join(lines)
 
 
 def _get_requested_time_per_visit(
-    target: Row, setup_time: float, n_visits=None
-) -> float:
+    t_exp: np.ndarray, n_visits: np.ndarray, setup_time: float
+) -> np.ndarray:
     """Calculate the requested visit time in hours."""
     # The total visit time in hours is needed to be compared to the hour angle
-    if n_visits is None:
-        n_visits = target["num_visits"]
-    return (target["t_exp"] / n_visits + setup_time) / 3600
+    return (t_exp / n_visits + setup_time) / 3600
 
 
-def _adjust_time_depending_on_trimester(time: float, trimester: Trimester) -> float:
+def _adjust_time_depending_on_trimester(
+    times: np.ndarray, trimester: Trimester
+) -> np.ndarray:
+    # All conditions act on the unadjusted times, so each time is shifted at most once
     # For trimester 1, keep the time above 22 h
     if trimester == Trimester.FIRST:
-        if time <= 22:
-            return time + 24.0
+        return np.where(times <= 22, times + 24.0, times)
     # for trimester 2, we keep 0-24  ####OLD: allow up to 32h, and take negatives +24
-    elif trimester == Trimester.SECOND:
-        if time > 25:
-            return time - 24.0
+    if trimester == Trimester.SECOND:
         # TODO: This seems fishy (I think it should be < 1), but it's what the original code did
-        if time < 2:
-            return time + 24.0
+        return np.where(
+            times > 25, times - 24.0, np.where(times < 2, times + 24.0, times)
+        )
     # for trimester 3, less than 12, send up to >24    #to 36 now
-    elif trimester == Trimester.THIRD:
-        if time < 12:
-            return time + 24.0
-        if time > 36:
-            return time - 24.0
-    else:
-        raise (ValueError(f"Trimester {trimester} not recognized."))
-    return time
-
-
-def _add_start_stop_times_for_single_target(
-    target: Row, track: Literal[1, 2], het_table: Table, config: HetTimeCalcConfig
+    if trimester == Trimester.THIRD:
+        return np.where(
+            times < 12, times + 24.0, np.where(times > 36, times - 24.0, times)
+        )
+    raise (ValueError(f"Trimester {trimester} not recognized."))
+
+
+def _add_start_stop_times_for_track(
+    track: Literal[1, 2],
+    targets: TargetArrays,
+    opt_ha: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray],
+    config: HetTimeCalcConfig,
+    outputs: Dict[str, np.ndarray],
+    warning_messages: List[Tuple[int, str]],
 ):
-    """Get the LST start and stop times for the given target and track.
-    Returns -99, -99 if the target is not on the given track.
+    """Write the LST start and stop times and the needed visits of all targets
+    for the given track into the preallocated output arrays.
+    Targets that are not on the given track keep their default values.
+    In verbose mode, warnings about targets that need more visits are appended
+    to the given list, together with the index of their target.
+
+    The target properties are passed as plain arrays, so no table access
+    happens within the calculation itself, and the optimal hour angles are
+    looked up once for both tracks.
     """
     assert track in [1, 2], f"Requested track must be 1 or 2, not {track}"
+    t_exp, num_visits = targets.t_exp, targets.num_visits
 
-    opt_ha = _get_optimal_hour_angles(het_table, target["dec"])
-
-    has_to_check = (1, 2) if track == 1 else (3, 4)
-    ha_1, ha_2 = (opt_ha[f"hour_angle_{i}"] for i in has_to_check)
+    ha_1, ha_2 = opt_ha[0:2] if track == 1 else opt_ha[2:4]
 
-    if not _is_on_track(ha_1, ha_2):
-        return
+    # The target is only on the given track if both hour angles are valid
+    on_track = (np.abs(ha_1) < 5) & (np.abs(ha_2) < 5)
 
-    ha_values = _calculate_ha_values(ha_1, ha_2)
+    _, _, ha_mid, ha_total = _calculate_ha_values(ha_1, ha_2)
 
-    requested_visit_time = _get_requested_time_per_visit(target, config.setup_time)
-    needed_visits = target["num_visits"]
+    requested_visit_time = _get_requested_time_per_visit(
+        t_exp, num_visits, config.setup_time
+    )
+    needed_visits = num_visits.copy()
 
     # VERIFY! is there enough time for this requested exptime within each visit?
-    if requested_visit_time > ha_values["total"]:
-        # If the requested time is above the available one, more visits are needed
-        needed_visits = int(1 + target["t_exp"] / 3600.0 / ha_values["total"])
-        if config.is_verbose:
-            _issue_exptime_warning(
-                ha_values["total"],
-                requested_visit_time,
-                target["num_visits"],
-                needed_visits,
-                opt_ha,
-                target["target_id"],
+    lacking_time = on_track & (requested_visit_time > ha_total)
+    # If the requested time is above the available one, more visits are needed
+    needed_visits[lacking_time] = (
+        1 + t_exp[lacking_time] / 3600.0 / ha_total[lacking_time]
+    ).astype(int)
+    if config.is_verbose:
+        # Iterate over plain arrays rather than table rows to avoid Row overhead
+        hour_angle_rows = zip(*(ha[lacking_time] for ha in opt_ha))
+        for i, target_id, available_h, req_h, n_req, n_needed, hour_angles in zip(
+            np.flatnonzero(lacking_time),
+            targets.target_id[lacking_time],
+            ha_total[lacking_time],
+            requested_visit_time[lacking_time],
+            num_visits[lacking_time],
+            needed_visits[lacking_time],
+            hour_angle_rows,
+        ):
+            message = _get_exptime_warning(
+                available_h, req_h, n_req, n_needed, hour_angles, target_id
             )
-        # Set the new necessary visit time
-        requested_visit_time = _get_requested_time_per_visit(
-            target, config.setup_time, needed_visits
-        )
+            warning_messages.append((i, message))
+    # Set the new necessary visit time
+    requested_visit_time = _get_requested_time_per_visit(
+        t_exp, needed_visits, config.setup_time
+    )
 
     # Use total time to extend on either side of this, optimal.
-    ha_start = ha_values["mid"] - requested_visit_time / 2.0
-    ha_stop = ha_values["mid"] + requested_visit_time / 2.0
+    ha_start = ha_mid - requested_visit_time / 2.0
+    ha_stop = ha_mid + requested_visit_time / 2.0
 
-    ra_h = target["ra"] / 15.0
+    ra_h = targets.ra / 15.0
     # combine with target RA to get LST start/stop
     lst_start = ra_h + ha_start
     lst_stop = ra_h + ha_stop
     lst_start = _adjust_time_depending_on_trimester(lst_start, config.trimester)
     lst_stop = _adjust_time_depending_on_trimester(lst_stop, config.trimester)
-    target[f"lst_{track}_start"] = lst_start
-    target[f"lst_{track}_stop"] = lst_stop
-    target[f"track_{track}_visits"] = needed_visits
+    outputs[f"lst_{track}_start"][on_track] = lst_start[on_track]
+    outputs[f"lst_{track}_stop"][on_track] = lst_stop[on_track]
+    outputs[f"track_{track}_visits"][on_track] = needed_visits[on_track]
 
 
 # Determine the LST times for each target
@@ -171,48 +246,86 @@ def add_target_start_stop_times(
     while the second columns indicate the number of visits needed to observe them,
     which is equal to Nvis if the time is available, or more if it is not.
     """
-    # First, register the columns with their default values
-    for colname in ["lst_1_start", "lst_1_stop", "lst_2_start", "lst_2_stop"]:
-        target_table[colname] = -99.0
-    target_table["track_1_visits"] = 0
-    target_table["track_2_visits"] = 0
-
-    for target in target_table:
-        _add_start_stop_times_for_single_target(
-            target, track=1, het_table=het_table, config=config
-        )
-        _add_start_stop_times_for_single_target(
-            target, track=2, het_table=het_table, config=config
+    # First, allocate the output arrays with their default values
+    num_targets = len(target_table)
+    outputs = {
+        colname: np.full(num_targets, -99.0)
+        for colname in ["lst_1_start", "lst_1_stop", "lst_2_start", "lst_2_stop"]
+    }
+    outputs["track_1_visits"] = np.zeros(num_targets, dtype=int)
+    outputs["track_2_visits"] = np.zeros(num_targets, dtype=int)
+
+    # Then calculate the values for all targets at once, track by track
+    targets = TargetArrays.from_table(target_table)
+    opt_ha = _get_optimal_hour_angles(HetArrays.from_table(het_table), targets.dec)
+    warning_messages = []
+    for track in (1, 2):
+        _add_start_stop_times_for_track(
+            track, targets, opt_ha, config, outputs, warning_messages
         )
+    # Emit all warnings at once instead of printing them line by line, ordered by
+    # target (the sort is stable, so track 1 stays before track 2 for each target)
+    if warning_messages:
+        warning_messages.sort(key=lambda index_and_message: index_and_message[0])
+        print("\n".join(message for _, message in warning_messages))
+    # Only write each column to the table once all values are known
+    for colname, values in outputs.items():
+        target_table[colname] = values
     target_table["insufficient_coverage"] = (
-        target_table["track_1_visits"] > target_table["num_visits"]
-    ) & (target_table["track_2_visits"] > target_table["num_visits"])
+        outputs["track_1_visits"] > targets.num_visits
+    ) & (outputs["track_2_visits"] > targets.num_visits)
     return target_table
 
 
-def _add_visit_counts_for_single_time(
-    visit_row: Row, targets: Table
-) -> Tuple[int, int, int]:
-    """Calculate the total number of east, west, or single track visits for a given time."""
-    time = visit_row["LST"]
-    t_1_mask = targets["track_1_visits"] > 0
-    t_2_mask = targets["track_2_visits"] > 0
-    t_1_time_mask = (targets[f"lst_1_start"] < time) & (time < targets[f"lst_1_stop"])
-    t_2_time_mask = (targets[f"lst_2_start"] < time) & (time < targets[f"lst_2_stop"])
+def _sum_weights_of_active_windows(
+    times: np.ndarray, starts: np.ndarray, stops: np.ndarray, weights: np.ndarray
+) -> np.ndarray:
+    """For each of the given times, sum up the weights of the windows with
+    start < time < stop.
+
+    Instead of comparing every time with every window, the window boundaries are sorted
+    and the cumulative weights of the windows that have opened (start < time) and
+    those that have already closed (stop <= time) are looked up via binary search.
+    """
+    # Empty windows can never contain any time, and would spoil the subtraction below
+    is_valid = starts < stops
+    starts, stops, weights = starts[is_valid], stops[is_valid], weights[is_valid]
+    start_order, stop_order = np.argsort(starts), np.argsort(stops)
+    cum_start_weights = np.concatenate([[0], np.cumsum(weights[start_order])])
+    cum_stop_weights = np.concatenate([[0], np.cumsum(weights[stop_order])])
+    num_opened = np.searchsorted(starts[start_order], times, side="left")
+    num_closed = np.searchsorted(stops[stop_order], times, side="right")
+    return cum_start_weights[num_opened] - cum_stop_weights[num_closed]
+
+
+def _sum_track_visits(
+    lst: np.ndarray, targets: Table, track: Literal[1, 2], mask: np.ndarray
+) -> np.ndarray:
+    """Sum up the visits on the given track of the masked targets that are in range
+    for each of the given times."""
+    return _sum_weights_of_active_windows(
+        lst,
+        np.asarray(targets[f"lst_{track}_start"])[mask],
+        np.asarray(targets[f"lst_{track}_stop"])[mask],
+        np.asarray(targets[f"track_{track}_visits"])[mask],
+    )
+
+
+def _get_visit_counts(
+    lst: np.ndarray, targets: Table
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Calculate the total number of east, west, and single track visits for the given times."""
+    t_1_mask = np.asarray(targets["track_1_visits"]) > 0
+    t_2_mask = np.asarray(targets["track_2_visits"]) > 0
     # Two times, east: All targets that have both tracks available and are in range for the given time
-    east_mask = t_1_mask & t_2_mask & t_1_time_mask
-    west_mask = t_1_mask & t_2_mask & t_2_time_mask
-    single_mask_1 = t_1_mask & ~t_2_mask & t_1_time_mask
-    single_mask_2 = ~t_1_mask & t_2_mask & t_2_time_mask
+    east_counts = _sum_track_visits(lst, targets, 1, t_1_mask & t_2_mask)
+    west_counts = _sum_track_visits(lst, targets, 2, t_1_mask & t_2_mask)
     # Opposed to how it was done before, I am using the visits prescribed to the target instead of the requested
     # ones (which were done using targets[Nvis])
-    single_count = (
-        targets[single_mask_1]["track_1_visits"].sum()
-        + targets[single_mask_2]["track_2_visits"].sum()
-    )
-    visit_row["east_tracks"] = targets[east_mask]["track_1_visits"].sum()
-    visit_row["west_tracks"] = targets[west_mask]["track_2_visits"].sum()
-    visit_row["single_tracks"] = single_count
+    single_counts = _sum_track_visits(
+        lst, targets, 1, t_1_mask & ~t_2_mask
+    ) + _sum_track_visits(lst, targets, 2, ~t_1_mask & t_2_mask)
+    return east_counts, west_counts, single_counts
 
 
 def add_visit_counts(visits_table: Table, target_table: Table) -> Table:
@@ -223,13 +336,12 @@ def add_visit_counts(visits_table: Table, target_table: Table) -> Table:
     The columns added to the visits table are called
         ["east_tracks", "west_tracks", "single_tracks"]
     """
-    # First register the columns with their default values
-    for colname in ["east_tracks", "west_tracks", "single_tracks"]:
-        visits_table[colname] = 0
-
-    # Then calculate the values
-    for visit_entry in visits_table:
-        _add_visit_counts_for_single_time(visit_entry, target_table)
+    east_counts, west_counts, single_counts = _get_visit_counts(
+        np.ascontiguousarray(visits_table["LST"], dtype=np.float64), target_table
+    )
+    visits_table["east_tracks"] = east_counts
+    visits_table["west_tracks"] = west_counts
+    visits_table["single_tracks"] = single_counts
     return visits_table
 
 
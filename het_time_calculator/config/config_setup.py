@@ -4,25 +4,37 @@ HET time calculator, as well as the configuration object itself.
 The configuration object is called HTC_CONFIG and is used throughout the
 code to access the configuration settings, which can also be changed
 via a command line call."""
+import os
+import tempfile
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
-from typing import Tuple
+from typing import TYPE_CHECKING, Optional, Tuple
+from zipfile import BadZipFile
 
+import numpy as np
 from astropy.io.ascii import read as ascii_read
 from astropy.table import Table
-from matplotlib.figure import Figure
 
 from ..util import Trimester, ask_overwrite
 from .argument_parsing import parse_args
-from .file_io import sanitize_het_table, sanitize_target_table, sanitize_visits_table
+from .file_io import (
+    HET_TABLE_CACHE_VERSION,
+    het_table_from_columns,
+    sanitize_het_table,
+    sanitize_target_table,
+    sanitize_visits_table,
+)
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
 
 
 @dataclass
 class HetTimeCalcConfig:
     """The configuration parameters for the HETDEX time calculator."""
 
-    trimester: Trimester = 1
+    trimester: Trimester = Trimester.FIRST
     "The trimester number (1,2,3)"
 
     year: int = 2020
@@ -52,6 +64,11 @@ class HetTimeCalcConfig:
     overwrite_existing: bool = False
     "Automatically overwrite existing files? (False)"
 
+    _het_table: Optional[Table] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    "The sanitized HET table, cached after it has been read once"
+
     def __post_init__(self):
         for fpath in [
             self._fpath_visit_file,
@@ -82,6 +99,11 @@ class HetTimeCalcConfig:
         """The path to the HET observation optical tracking file."""
         return self._base_path.joinpath("data/HET_opt_tracking.txt")
 
+    @property
+    def _fpath_het_table_cache(self) -> Path:
+        """The path to the cached columns of the sanitized HET table."""
+        return self._fpath_het_table.with_suffix(".npz")
+
     @property
     def lst_offset(self) -> int:
         """The offset to use for plotting."""
@@ -115,7 +137,7 @@ class HetTimeCalcConfig:
         """Create a HetTimeCalcConfig from the command line arguments."""
         args = parse_args(cls)
         return cls(
-            trimester=Trimester(args.trimester),
+            trimester=Trimester.from_int(args.trimester),
             year=args.year,
             include_hetdex=args.include_HETDEX,
             include_losses=args.include_losses,
@@ -128,11 +150,76 @@ class HetTimeCalcConfig:
         )
 
     def get_het_table(self) -> Table:
-        """Read and sanitize the HET table."""
-        het_table: Table = ascii_read(self._fpath_het_table)
+        """Read and sanitize the HET table.
+        The result is cached, so subsequent calls reuse it instead of
+        re-reading the file."""
+        if self._het_table is None:
+            self._het_table = self._read_het_table()
+        return self._het_table
+
+    def _read_het_table(self) -> Table:
+        """Read the HET table from its cache file if that is valid and newer than
+        the tracking file, otherwise parse and sanitize the tracking file and try
+        to update the cache."""
+        fpath, cache_fpath = self._fpath_het_table, self._fpath_het_table_cache
+        if (
+            cache_fpath.exists()
+            and cache_fpath.stat().st_mtime >= fpath.stat().st_mtime
+        ):
+            het_table = self._load_het_table_cache(cache_fpath)
+            if het_table is not None:
+                return het_table
+        het_table: Table = ascii_read(fpath)
         het_table = sanitize_het_table(het_table)
+        self._write_het_table_cache(het_table, cache_fpath)
         return het_table
 
+    def _load_het_table_cache(self, cache_fpath: Path) -> Optional[Table]:
+        """Load the HET table from the given cache file.
+        Returns None if the file is unreadable or has been written by
+        a different version of the sanitization."""
+        try:
+            with np.load(cache_fpath) as cached:
+                version = cached["_cache_version"]
+                if version != HET_TABLE_CACHE_VERSION:
+                    return None
+                columns = {
+                    name: cached[name]
+                    for name in cached.files
+                    if name != "_cache_version"
+                }
+        except (BadZipFile, ValueError, KeyError, OSError, EOFError):
+            if self.is_verbose:
+                print(f"Ignoring unreadable HET table cache '{cache_fpath}'.")
+            return None
+        return het_table_from_columns(columns)
+
+    def _write_het_table_cache(self, het_table: Table, cache_fpath: Path):
+        """Write the columns of the sanitized HET table to the cache file.
+        The file is written to a temporary file first and then moved into place,
+        so an interrupted or concurrent run never leaves a partial cache behind."""
+        tmp_fpath = None
+        try:
+            with tempfile.NamedTemporaryFile(
+                dir=cache_fpath.parent,
+                prefix=f".{cache_fpath.stem}.",
+                suffix=".npz",
+                delete=False,
+            ) as tmp_file:
+                tmp_fpath = Path(tmp_file.name)
+                np.savez(
+                    tmp_file,
+                    _cache_version=HET_TABLE_CACHE_VERSION,
+                    **{name: het_table[name] for name in het_table.colnames},
+                )
+            os.replace(tmp_fpath, cache_fpath)
+        except OSError:
+            # The data directory might not be writable, in which case we just don't cache
+            if tmp_fpath is not None:
+                tmp_fpath.unlink(missing_ok=True)
+            if self.is_verbose:
+                print(f"Could not write HET table cache to '{cache_fpath}'.")
+
     def get_target_table(self) -> Table:
         """Read the target table."""
         # This is its own function since we might add some sanitization later
@@ -156,7 +243,7 @@ class HetTimeCalcConfig:
             if self.is_verbose:
                 print(f"Output file not written.")
 
-    def save_plot(self, fig: Figure):
+    def save_plot(self, fig: "Figure"):
         """Save the plot."""
         fpath = self._fpath_plot
         if self.overwrite_existing or ask_overwrite(fpath):
@@ -1,3 +1,7 @@
-from .het_table import sanitize_het_table
+from .het_table import (
+    HET_TABLE_CACHE_VERSION,
+    het_table_from_columns,
+    sanitize_het_table,
+)
 from .visits_table import sanitize_visits_table
 from .target_table import sanitize_target_table
\ No newline at end of file
@@ -1,6 +1,6 @@
 """Submodule to read the HET table."""
 
-from typing import Literal
+from typing import Literal, Mapping
 
 import numpy as np
 from astropy.table import Table
@@ -33,6 +33,12 @@ def _get_other_hour_angles(
     return new_hour_angles
 
 
+HET_TABLE_CACHE_VERSION = 1
+"""Version of the cached sanitized HET table columns.
+Bump this whenever the sanitization changes the resulting columns,
+so that outdated cache files are ignored."""
+
+
 def sanitize_het_table(het_table: Table) -> Table:
     """Read the HET opt tracking file and assign sensible column names.
     The columns are:
@@ -51,3 +57,15 @@ def sanitize_het_table(het_table: Table) -> Table:
     het_table["hour_angle_3"] = _get_other_hour_angles(het_table, 3)
     het_table["hour_angle_4"] = _get_other_hour_angles(het_table, 4)
     return het_table
+
+
+def het_table_from_columns(columns: Mapping[str, np.ndarray]) -> Table:
+    """Restore the HET table from already sanitized columns, e.g. loaded from
+    a cache file, without having to run the sanitization again.
+
+    Returns
+    -------
+    Table
+        The HET table.
+    """
+    return Table({name: columns[name] for name in columns})
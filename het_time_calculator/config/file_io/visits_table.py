@@ -8,25 +8,10 @@ if TYPE_CHECKING:
     from ...config import HTC_CONFIG
 
 
-def _get_single_time_to_lose(het_entry: float, dark_entry: float) -> float:
-    """Calculate the time to lose from the HETDEX entry and dark entry.
-    It is the minimum of the het_entry and dark_entry."""
-    if het_entry < dark_entry:
-        return het_entry
-    elif het_entry > dark_entry:
-        return dark_entry
-    else:
-        return 0.0
-
-
 def _get_time_to_lose(hetdex_visits: np.ndarray, dark_visits: np.ndarray) -> np.ndarray:
-    """Calculate the time to lose from the HETDEX visits and dark visits."""
-    return np.array(
-        [
-            _get_single_time_to_lose(het, dark)
-            for het, dark in zip(hetdex_visits, dark_visits)
-        ]
-    )
+    """Calculate the time to lose from the HETDEX visits and dark visits.
+    It is the element-wise minimum of the two."""
+    return np.minimum(np.asarray(hetdex_visits), np.asarray(dark_visits))
 
 
 def _subtract_hetdex_lose_time(visits_table: Table) -> Table:
@@ -42,11 +27,10 @@ def _subtract_hetdex_lose_time(visits_table: Table) -> Table:
 
 def _get_lst_step_size(visits_table: Table) -> float:
     """Calculate the LST step size from the visits table."""
-    # calculate LST step size from data
+    # The mean of the consecutive differences telescopes to the total span
+    # divided by the number of steps, so there's no need to compute them
     lst_data = visits_table["LST"]
-    dall = lst_data[1:] - lst_data[0:-1]
-    step_size = np.mean(dall)
-    return step_size
+    return (lst_data[-1] - lst_data[0]) / (len(lst_data) - 1)
 
 
 def sanitize_visits_table(visits_table: Table, config: "HTC_CONFIG") -> Table:
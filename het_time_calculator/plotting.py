@@ -1,16 +1,14 @@
-from typing import Tuple
+from typing import TYPE_CHECKING, Tuple
 
-import matplotlib.pyplot as plt
 from astropy.table import Table
-from matplotlib import rc
-from matplotlib.axes import Axes
-from matplotlib.figure import Figure
-from matplotlib.ticker import FuncFormatter, MultipleLocator
 
 from .config import HTC_CONFIG
 
-rc("font", **{"family": "serif", "serif": ["Computer Modern Roman"], "size": 20})
-rc("text", usetex=True)
+# matplotlib is only imported once a plot is set up, so the calculations
+# can be used without paying for its import time
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+    from matplotlib.figure import Figure
 
 
 def _format_ticks_to_represent_hours(value, tick_number) -> str:
@@ -19,7 +17,7 @@ def _format_ticks_to_represent_hours(value, tick_number) -> str:
     return f"{value:.0f}" if value <= 24 else value - 24
 
 
-def _add_labels_and_descriptions(ax: Axes):
+def _add_labels_and_descriptions(ax: "Axes"):
     """Set pretty labels and texts for the ax"""
     hetdex_info_text = (
         "Subtracting HETDEX allocations."
@@ -43,10 +41,16 @@ def _add_labels_and_descriptions(ax: Axes):
     ax.grid(True, which="major", axis="y", alpha=0.7)
 
 
-def setup_visit_plot() -> Tuple[Figure, Axes]:
+def setup_visit_plot() -> Tuple["Figure", "Axes"]:
     """Set up the plot for the visit showcase,
     where the x-axis displays the 24 h of LST, and the y-axis the number of visits
     for each of the times."""
+    import matplotlib.pyplot as plt
+    from matplotlib import rc
+    from matplotlib.ticker import FuncFormatter, MultipleLocator
+
+    rc("font", **{"family": "serif", "serif": ["Computer Modern Roman"], "size": 20})
+    rc("text", usetex=True)
     # - Set up figure and axes
     fig, ax = plt.subplots(figsize=(13, 6))
     plt.subplots_adjust(wspace=0.25, hspace=0)
@@ -64,7 +68,7 @@ def setup_visit_plot() -> Tuple[Figure, Axes]:
     return fig, ax
 
 
-def _plot_track_histograms(ax: Axes, visit_table: Table):
+def _plot_track_histograms(ax: "Axes", visit_table: Table):
     x_vals = visit_table["LST"]
     y_east, y_west = visit_table["east_tracks"], visit_table["west_tracks"]
     y_single = visit_table["single_tracks"]
@@ -74,7 +78,7 @@ def _plot_track_histograms(ax: Axes, visit_table: Table):
     ax.fill(x_vals, y_west, color="green", lw=0, alpha=0.3)
 
 
-def _plot_visit_curves(ax: Axes, visit_table: Table):
+def _plot_visit_curves(ax: "Axes", visit_table: Table):
     """Plot the visit times on the given ax."""
     x_vals = visit_table["LST"]
     y_all, y_dark, y_gray = (
@@ -87,7 +91,7 @@ def _plot_visit_curves(ax: Axes, visit_table: Table):
     ax.plot(x_vals, y_gray, color="grey", lw=2, label="Gray (gray+dark)")
 
 
-def plot_visit_histograms(ax: Axes, visit_table: Table):
+def plot_visit_histograms(ax: "Axes", visit_table: Table):
     """Plot the visit histograms on the given ax."""
     _plot_visit_curves(ax, visit_table)
     _plot_track_histograms(ax, visit_table)
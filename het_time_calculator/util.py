@@ -1,4 +1,6 @@
-from enum import Enum
+import calendar
+from enum import IntEnum
+from functools import lru_cache
 from pathlib import Path
 
 import numpy as np
@@ -16,7 +18,45 @@ FRACTION_PR_LOST = 0.056
 FRACTION_ENG_LOST = 0.10
 
 # merge weather+PR, monthly array
-FRACTION_GOOD_TIME = (1.0 - FRACTIONS_WEATHER_LOST) * (1.0 - FRACTION_PR_LOST)
+# Precomputed as (1.0 - FRACTIONS_WEATHER_LOST) * (1.0 - FRACTION_PR_LOST),
+# and frozen so it can be shared without defensive copies
+FRACTION_GOOD_TIME = np.array(
+    [
+        0.605104, 0.625872, 0.586224, 0.627760, 0.627760, 0.623984,
+        0.472944, 0.539968, 0.494656, 0.647584, 0.711776, 0.617376,
+    ],
+    dtype=np.float64,
+)  # fmt: skip
+#       Jan       Feb       Mar       Apr       May       Jun
+#       Jul       Aug       Sep       Oct       Nov       Dec
+FRACTION_GOOD_TIME.setflags(write=False)
+
+# float32 variants for consumers working with float32 arrays of hours, which would
+# otherwise be upcast. The daily versions map the (0-based) day of year directly
+# to the fraction of its month.
+FRACTION_GOOD_TIME_F32 = FRACTION_GOOD_TIME.astype(np.float32)
+FRACTION_GOOD_TIME_F32.setflags(write=False)
+_DAYS_PER_MONTH = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+_MONTH_OF_DAY_OF_YEAR = np.repeat(np.arange(12), _DAYS_PER_MONTH)
+FRACTION_GOOD_TIME_DAILY = FRACTION_GOOD_TIME_F32[_MONTH_OF_DAY_OF_YEAR]
+FRACTION_GOOD_TIME_DAILY.setflags(write=False)
+# Day 59 is the 29th of February in leap years
+_FRACTION_GOOD_TIME_DAILY_LEAP = np.insert(
+    FRACTION_GOOD_TIME_DAILY, 59, FRACTION_GOOD_TIME_F32[1]
+)
+_FRACTION_GOOD_TIME_DAILY_LEAP.setflags(write=False)
+
+
+def get_daily_fraction_good_time(year: int) -> np.ndarray:
+    """Get the float32 fraction of good time for each (0-based) day of the given year,
+    i.e. an array with 366 entries for leap years and 365 entries otherwise."""
+    if calendar.isleap(year):
+        return _FRACTION_GOOD_TIME_DAILY_LEAP
+    return FRACTION_GOOD_TIME_DAILY
+
+
+_YES_ANSWERS = frozenset({"y", "yes"})
+_NO_ANSWERS = frozenset({"n", "no"})
 
 
 def ask_overwrite(fpath: Path) -> bool:
@@ -25,20 +65,22 @@ def ask_overwrite(fpath: Path) -> bool:
     If the user answers 'y', return True, otherwise False.
     If the file does not exist, return True.
     """
-    if fpath.exists():
-        answer = input(f"{fpath} already exists. Do you want to overwrite? [y/n] ")
-        # After 5 unsuccessful tries, skip overwriting
-        for _ in range(5):
-            if answer.lower() in ["y", "yes"]:
-                return True
-            elif answer.lower() in ["n", "no"]:
-                return False
-            answer = input("Please answer with 'y' or 'n'.")
-        return False
-    return True
-
-
-class Trimester(Enum):
+    if not fpath.exists():
+        return True
+    prompt = f"{fpath} already exists. Do you want to overwrite? [y/n] "
+    # After 5 unsuccessful tries, skip overwriting
+    for _ in range(5):
+        answer = input(prompt).strip().lower()
+        if answer in _YES_ANSWERS:
+            return True
+        if answer in _NO_ANSWERS:
+            return False
+        prompt = "Please answer with 'y' or 'n'."
+    return False
+
+
+class Trimester(IntEnum):
+    # As an IntEnum, the members natively compare equal to their plain int values
     FIRST = 1
     SECOND = 2
     THIRD = 3
@@ -46,7 +88,10 @@ class Trimester(Enum):
     def __str__(self) -> str:
         return str(self.value)
 
-    def __eq__(self, __value: object) -> bool:
-        if isinstance(__value, int):
-            return self.value == __value
-        return super().__eq__(__value)
+    @staticmethod
+    @lru_cache(maxsize=4)
+    def from_int(value: int) -> "Trimester":
+        """Get the trimester for the given number, caching the lookup.
+        With only three members, the cache holds every possible result,
+        so repeated calls skip the Enum construction machinery."""
+        return Trimester(value)